@@ -3,7 +3,7 @@
 
 """
     Purpose
-        Define function to draw graphic element
+        Define functions to draw graphic element
     Inputs
         None
     Outputs
@@ -14,9 +14,197 @@
         None
 """
 
+import base64
+from functools import lru_cache
+import hashlib
+from html import escape
+import mimetypes
+from typing import Optional
+
 import drawsvg as draw
 
 
+@lru_cache(maxsize=256)
+def calculate_element_layout(
+    width: int,
+    height: int,
+    title_text_size: int,
+    subtitle_text_size: int,
+    title_position: str,
+    text_anchor: str,
+    margin_dim: tuple,
+    circle_padding_dim: tuple,
+) -> tuple:
+    """
+    Calculate positions of graphic element components, relative to the top-left
+    corner of the element
+
+    Parameters
+        - width: Width of element
+        - height: Height of element
+        - title_text_size: Font size of title
+        - subtitle_text_size: Font size of subtitle
+        - title_position: Position of title
+        - text_anchor: Text anchor
+        - margin_dim: Margin dimensions, as a tuple of (side, value) pairs
+        - circle_padding_dim: Padding dimensions for circle, as a tuple of (side, value)
+        pairs
+
+    Returns
+        - Tuple of circle radius, x- and y-offsets of the top-left corner of the circle,
+        title x- and y-offsets, subtitle y-offset and text dominant baseline
+
+    Notes
+        - Results are cached, as elements in a graphic generally share dimensions and
+        styling. margin_dim and circle_padding_dim are passed as tuples so that they are
+        hashable
+    """
+    margin_dim = dict(margin_dim)
+    circle_padding_dim = dict(circle_padding_dim)
+
+    # Calculate circle dimensions
+    circle_radius = min(
+        (
+            width -
+            margin_dim['left'] -
+            margin_dim['right'] -
+            circle_padding_dim['left'] -
+            circle_padding_dim['right']
+        ) / 2,
+        (
+            height -
+            margin_dim['top'] -
+            margin_dim['bottom'] -
+            circle_padding_dim['top'] -
+            circle_padding_dim['bottom'] -
+            title_text_size -
+            subtitle_text_size
+        ) / 2,
+    )
+    circle_x = width / 2 - circle_radius
+    circle_y = margin_dim['top'] + circle_padding_dim['top']
+
+    # Calculate title x-coordinate
+    if text_anchor == 'start':
+        title_x = margin_dim['left']
+    elif text_anchor == 'middle':
+        title_x = width / 2
+    elif text_anchor == 'end':
+        title_x = width - margin_dim['right']
+
+    # Calculate title y-coordinate
+    if title_position == 'top':
+        title_y = margin_dim['top']
+        subtitle_y = margin_dim['top'] + title_text_size
+        dominant_baseline = 'hanging'
+    elif title_position == 'bottom':
+        title_y = height - margin_dim['bottom'] - subtitle_text_size
+        subtitle_y = height - margin_dim['bottom']
+        dominant_baseline = 'auto'
+
+    return (
+        circle_radius, circle_x, circle_y, title_x, title_y, subtitle_y, dominant_baseline
+    )
+
+
+def calculate_element_coordinates(
+    x: int,
+    y: int,
+    width: int,
+    height: int,
+    title_text_size: int,
+    subtitle_text_size: int,
+    title_position: str,
+    text_anchor: str,
+    margin_dim: dict,
+    circle_padding_dim: dict,
+) -> tuple:
+    """
+    Calculate coordinates of graphic element components
+
+    Parameters
+        - x: x-coordinate of top-left corner of element
+        - y: y-coordinate of top-left corner of element
+        - width: Width of element
+        - height: Height of element
+        - title_text_size: Font size of title
+        - subtitle_text_size: Font size of subtitle
+        - title_position: Position of title
+        - text_anchor: Text anchor
+        - margin_dim: Margin dimensions
+        - circle_padding_dim: Padding dimensions for circle
+
+    Returns
+        - Tuple of background x, y, width and height, circle centre x and y and
+        radius, image x and y, text x, title y, subtitle y and text dominant baseline
+
+    Notes
+        - This is shared by draw_element() and draw_element_fast(), so that both
+        position components in the same way
+        - Coordinates are rounded to keep the size of the resulting SVG down
+    """
+
+    # Calculate positions of components, relative to the element
+    (
+        circle_radius, circle_x, circle_y, title_x, title_y, subtitle_y, dominant_baseline
+    ) = calculate_element_layout(
+        width=width,
+        height=height,
+        title_text_size=title_text_size,
+        subtitle_text_size=subtitle_text_size,
+        title_position=title_position,
+        text_anchor=text_anchor,
+        margin_dim=tuple(sorted(margin_dim.items())),
+        circle_padding_dim=tuple(sorted(circle_padding_dim.items())),
+    )
+
+    # Calculate coordinates of components
+    background_x = round(x, 2)
+    background_y = round(y, 2)
+    background_width = round(width, 2)
+    background_height = round(height, 2)
+    circle_cx = round(x + width / 2, 2)
+    circle_cy = round(y + circle_y + circle_radius, 2)
+    circle_r = round(circle_radius, 2)
+    image_x = round(x + circle_x, 2)
+    image_y = round(y + circle_y, 2)
+    text_x = round(x + title_x, 2)
+    title_text_y = round(y + title_y, 2)
+    subtitle_text_y = round(y + subtitle_y, 2)
+
+    return (
+        background_x, background_y, background_width, background_height,
+        circle_cx, circle_cy, circle_r, image_x, image_y,
+        text_x, title_text_y, subtitle_text_y, dominant_baseline,
+    )
+
+
+@lru_cache(maxsize=1024)
+def encode_image(
+    image: str,
+) -> str:
+    """
+    Encode image as a data URI
+
+    Parameters
+        - image: Filepath of image
+
+    Returns
+        - Data URI of image
+
+    Notes
+        - Where the image type can't be identified from the filepath, it is
+        assumed to be a PNG, as in drawsvg
+        - Results are cached, so an image used in several elements or graphics is
+        only read and encoded once
+    """
+    mime_type = mimetypes.guess_type(image)[0] or 'image/png'
+    with open(image, 'rb') as f:
+        data = base64.b64encode(f.read()).decode('ascii')
+
+    return f'data:{mime_type};base64,{data}'
+
+
 # DEFINE FUNCTION
 def draw_element(
     x: int,
@@ -37,7 +225,7 @@ def draw_element(
     font_family: str,
     title_position: str,
     text_anchor: str,
-    image: str,
+    image: Optional[str],
     margin_dim: dict,
     circle_padding_dim: dict,
     circle_stroke_color: str,
@@ -65,7 +253,8 @@ def draw_element(
         - font_family: Font family
         - title_position: Position of title
         - text_anchor: Text anchor
-        - image: Image to be displayed in element
+        - image: Filepath of image to be displayed in element. If None, no image
+        is displayed
         - margin_dim: Margin dimensions
         - circle_padding_dim: Padding dimensions for circle
         - circle_stroke_color: Stroke colour of circle
@@ -78,99 +267,73 @@ def draw_element(
         - None
     """
 
-    # Create element group
-    element = draw.Group()
+    # Calculate coordinates of components
+    (
+        background_x, background_y, background_width, background_height,
+        circle_cx, circle_cy, circle_r, image_x, image_y,
+        text_x, title_text_y, subtitle_text_y, dominant_baseline,
+    ) = calculate_element_coordinates(
+        x=x,
+        y=y,
+        width=width,
+        height=height,
+        title_text_size=title_text_size,
+        subtitle_text_size=subtitle_text_size,
+        title_position=title_position,
+        text_anchor=text_anchor,
+        margin_dim=margin_dim,
+        circle_padding_dim=circle_padding_dim,
+    )
 
-    # Add background
-    element.append(
+    # Create element components
+    # NB: Components are collected in a list and added to the element group in one go
+    circle = draw.Circle(
+        cx=circle_cx,
+        cy=circle_cy,
+        r=circle_r,
+        stroke=circle_stroke_color,
+        stroke_width=circle_stroke_width,
+        fill=circle_stroke_color
+    )
+    children = [
         draw.Rectangle(
-            x,
-            y,
-            width,
-            height,
+            background_x,
+            background_y,
+            background_width,
+            background_height,
             fill=background_color,
         ),
-    )
+        circle,
+    ]
 
-    # Add circle clip path
-    circle_radius = min(
-        (
-            width -
-            margin_dim['left'] -
-            margin_dim['right'] -
-            circle_padding_dim['left'] -
-            circle_padding_dim['right']
-        ) / 2,
-        (
-            height -
-            margin_dim['top'] -
-            margin_dim['bottom'] -
-            circle_padding_dim['top'] -
-            circle_padding_dim['bottom'] -
-            title_text_size -
-            subtitle_text_size
-        ) / 2,
-    )
+    # Add image, clipped to circle
+    # NB: The clip path is only created where there's an image to apply it to
+    # NB: The image is passed to drawsvg as an already-encoded data URI, which it uses
+    # as-is where embed is False
+    # NB: The clip path references the circle rather than duplicating it, so the
+    # circle's geometry only appears once in the SVG
+    if image is not None:
+        clip_circle = draw.ClipPath()
+        clip_circle.append(draw.Use(circle, 0, 0))
 
-    clip_circle = draw.ClipPath()
-    clip_circle.append(
-        draw.Circle(
-            cx=x + width / 2,
-            cy=y + margin_dim['top'] + circle_padding_dim['top'] + circle_radius,
-            r=circle_radius,
-            stroke_width=circle_stroke_width,
+        children.append(
+            draw.Image(
+                clip_path=clip_circle,
+                x=image_x,
+                y=image_y,
+                path=encode_image(image),
+                embed=False,
+                width=2 * circle_r,
+                height=2 * circle_r,
+            ),
         )
-    )
-
-    # Add circle
-    element.append(
-        draw.Circle(
-            cx=x + width / 2,
-            cy=y + margin_dim['top'] + circle_padding_dim['top'] + circle_radius,
-            r=circle_radius,
-            stroke=circle_stroke_color,
-            stroke_width=circle_stroke_width,
-            fill=circle_stroke_color
-        ),
-    )
-
-    # Add image
-    element.append(
-        draw.Image(
-            clip_path=clip_circle,
-            x=x + width / 2 - circle_radius,
-            y=y + margin_dim['top'] + circle_padding_dim['top'],
-            path=image,
-            embed=True,
-            width=2 * circle_radius,
-            height=2 * circle_radius,
-        ),
-    )
-
-    # Calculate title x-coordinate
-    if text_anchor == 'start':
-        title_x = x + margin_dim['left']
-    elif text_anchor == 'middle':
-        title_x = x + width / 2
-    elif text_anchor == 'end':
-        title_x = x + width - margin_dim['right']
-
-    # Calculate title y-coordinate
-    if title_position == 'top':
-        title_y = y + margin_dim['top']
-        subtitle_y = y + margin_dim['top'] + title_text_size
-        dominant_baseline = 'hanging'
-    elif title_position == 'bottom':
-        title_y = y + height - margin_dim['bottom'] - subtitle_text_size
-        subtitle_y = y + height - margin_dim['bottom']
-        dominant_baseline = 'auto'
 
-    # Add title
-    element.append(
+    # Add title and subtitle
+    children.extend([
         draw.Text(
             title,
-            x=title_x,
-            y=title_y,
+            x=text_x,
+            y=title_text_y,
             font_size=title_text_size,
             font_weight=title_text_weight,
             font_family=font_family,
@@ -179,14 +342,10 @@ def draw_element(
             text_anchor=text_anchor,
             dominant_baseline=dominant_baseline,
         ),
-    )
-
-    # Add subtitle
-    element.append(
         draw.Text(
             subtitle,
-            x=title_x,
-            y=subtitle_y,
+            x=text_x,
+            y=subtitle_text_y,
             font_size=subtitle_text_size,
             font_weight=subtitle_text_weight,
             font_family=font_family,
@@ -195,7 +354,179 @@ def draw_element(
             text_anchor=text_anchor,
             dominant_baseline=dominant_baseline,
         ),
-    )
+    ])
+
+    # Create element group
+    element = draw.Group()
+    element.extend(children)
 
     # Return element
     return element
+
+
+def format_attributes(
+    **attributes,
+) -> str:
+    """
+    Format keyword arguments as SVG attributes
+
+    Parameters
+        - attributes: Attribute values. Underscores in names are replaced with hyphens,
+        and attributes with a value of None are omitted
+
+    Returns
+        - String of attributes, each preceded by a space
+
+    Notes
+        - None
+    """
+    return ''.join(
+        f' {name.replace("_", "-")}="{escape(str(value))}"'
+        for name, value in attributes.items()
+        if value is not None
+    )
+
+
+def draw_element_fast(
+    x: int,
+    y: int,
+    width: int,
+    height: int,
+    background_color: str,
+    title: str,
+    title_text_size: int,
+    title_text_weight: int,
+    title_text_color: str,
+    title_text_style: str,
+    subtitle: str,
+    subtitle_text_size: int,
+    subtitle_text_weight: int,
+    subtitle_text_color: str,
+    subtitle_text_style: str,
+    font_family: str,
+    title_position: str,
+    text_anchor: str,
+    image: Optional[str],
+    margin_dim: dict,
+    circle_padding_dim: dict,
+    circle_stroke_color: str,
+    circle_stroke_width: int = 0,
+) -> str:
+    """
+    Draw graphic element as SVG markup
+
+    Parameters
+        - See draw_element() docstring
+
+    Returns
+        - element: SVG markup of graphic element, as a <g> element
+
+    Notes
+        - This produces the same element as draw_element(), but writes SVG markup
+        directly rather than building drawsvg objects. It's intended for elements that
+        aren't edited after being drawn. The result can be added to a drawing using
+        draw.Raw()
+    """
+
+    # Calculate coordinates of components
+    (
+        background_x, background_y, background_width, background_height,
+        circle_cx, circle_cy, circle_r, image_x, image_y,
+        text_x, title_text_y, subtitle_text_y, dominant_baseline,
+    ) = calculate_element_coordinates(
+        x=x,
+        y=y,
+        width=width,
+        height=height,
+        title_text_size=title_text_size,
+        subtitle_text_size=subtitle_text_size,
+        title_position=title_position,
+        text_anchor=text_anchor,
+        margin_dim=margin_dim,
+        circle_padding_dim=circle_padding_dim,
+    )
+
+    # Create IDs for the circle and its clip path
+    # NB: IDs are a hash of the circle's attributes, so the same graphic always gives
+    # the same SVG. IDs only clash between circles that are identical, including
+    # those in other graphics displayed on the same page, in which case it doesn't
+    # matter which one a clip path refers to
+    if image is not None:
+        element_id = hashlib.blake2b(
+            repr((
+                circle_cx, circle_cy, circle_r, circle_stroke_color, circle_stroke_width
+            )).encode(),
+            digest_size=8,
+        ).hexdigest()
+        circle_id = f'circle-{element_id}'
+        clip_id = f'clip-{element_id}'
+    else:
+        circle_id = None
+
+    # Add background and circle
+    parts = [
+        '<g>',
+        '<rect' + format_attributes(
+            x=background_x,
+            y=background_y,
+            width=background_width,
+            height=background_height,
+            fill=background_color,
+        ) + ' />',
+        '<circle' + format_attributes(
+            id=circle_id,
+            cx=circle_cx,
+            cy=circle_cy,
+            r=circle_r,
+            stroke=circle_stroke_color,
+            stroke_width=circle_stroke_width,
+            fill=circle_stroke_color,
+        ) + ' />',
+    ]
+
+    # Add image, clipped to circle
+    # NB: The clip path references the circle rather than duplicating it, so the
+    # circle's geometry only appears once in the SVG
+    if image is not None:
+        parts.extend([
+            f'<clipPath id="{clip_id}">',
+            f'<use xlink:href="#{circle_id}" />',
+            '</clipPath>',
+            '<image' + format_attributes(
+                x=image_x,
+                y=image_y,
+                width=2 * circle_r,
+                height=2 * circle_r,
+                clip_path=f'url(#{clip_id})',
+            ) + f' xlink:href="{encode_image(image)}" />',
+        ])
+
+    # Add title and subtitle
+    parts.extend([
+        '<text' + format_attributes(
+            x=text_x,
+            y=title_text_y,
+            font_size=title_text_size,
+            font_weight=title_text_weight,
+            font_family=font_family,
+            font_style=title_text_style,
+            fill=title_text_color,
+            text_anchor=text_anchor,
+            dominant_baseline=dominant_baseline,
+        ) + f'>{escape(str(title))}</text>',
+        '<text' + format_attributes(
+            x=text_x,
+            y=subtitle_text_y,
+            font_size=subtitle_text_size,
+            font_weight=subtitle_text_weight,
+            font_family=font_family,
+            font_style=subtitle_text_style,
+            fill=subtitle_text_color,
+            text_anchor=text_anchor,
+            dominant_baseline=dominant_baseline,
+        ) + f'>{escape(str(subtitle))}</text>',
+        '</g>',
+    ])
+
+    # Return element
+    return ''.join(parts)
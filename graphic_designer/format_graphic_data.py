@@ -16,37 +16,42 @@
 
 from typing import Literal, Optional, Union
 
+import numpy as np
 import pandas as pd
 
 
 def calculate_offset_rows(
-    elements: int,
+    elements: Union[int, np.ndarray],
     elements_per_row: int,
-) -> int:
+) -> Union[int, np.ndarray]:
     """
     Calculate number of rows needed for a section with an offset
 
     Parameters
-        - elements: Number of elements in the section
+        - elements: Number of elements in the section, or an array of element
+        counts for several sections
         - elements_per_row: Number of elements to be drawn per row. Where offset_rows is
         True, this will be the number of elements in the odd rows of each section and
         even rows will contain one fewer element
 
     Returns
-        - Number of rows needed for the section
+        - Number of rows needed for the section, or an array of row counts where
+        elements is an array
 
     Notes
         - None
     """
-    complete_row_pairs = elements // (2 * elements_per_row - 1)
-    complete_row_pair_elements = complete_row_pairs * (2 * elements_per_row - 1)
-    remaining_elements = elements - complete_row_pair_elements
-    if remaining_elements == 0:
-        return 2 * complete_row_pairs
-    elif remaining_elements <= elements_per_row:
-        return 2 * complete_row_pairs + 1
-    else:
-        return 2 * complete_row_pairs + 2
+    # NB: divmod() finds the quotient and remainder in a single pass, including where
+    # elements is an array
+    complete_row_pairs, remaining_elements = divmod(elements, 2 * elements_per_row - 1)
+
+    # NB: remaining_elements fill one further row if there are any, and a second if
+    # they don't fit in an odd row. Adding the comparisons avoids branching
+    return (
+        2 * complete_row_pairs +
+        (remaining_elements > 0) +
+        (remaining_elements > elements_per_row)
+    )
 
 
 def format_graphic_data(
@@ -90,25 +95,31 @@ def format_graphic_data(
         rows
 
     Notes
-        - None
+        - Elements are ordered by section and then by the index labels of df
     """
     # Check that section_col doesn't contain any missing values
-    if df[section_col].isnull().any():
+    # NB: hasnans avoids creating an intermediate boolean Series
+    if df[section_col].hasnans:
         raise ValueError(f"Missing values found in {section_col}")
 
-    # Check that if section_sort_by is a list all elements are in df['section_col']
+    # Check that if section_sort_by is a list all elements are in df['section_col'] and
+    # all elements in df['section_col'] are in section_sort_by
+    # NB: Unique values are found once and compared as sets, rather than rescanning
+    # section_col for every value checked. Each difference is found in a single pass,
+    # keeping values in the order they appear
     if isinstance(section_sort_by, list):
-        if not all([x in df[section_col].unique() for x in section_sort_by]):
-            values_not_found = [x for x in section_sort_by if x not in df[section_col].unique()]
+        unique_sections = df[section_col].unique()
+        unique_sections_set = set(unique_sections)
+        section_sort_by_set = set(section_sort_by)
+
+        values_not_found = [x for x in section_sort_by if x not in unique_sections_set]
+        if values_not_found:
             raise ValueError(
                 f"Values in section_sort_by not found in {section_col}: {values_not_found}"
             )
 
-    # Check that if section_sort_by is a list all elements in df['section_col'] are
-    # in section_sort_by
-    if isinstance(section_sort_by, list):
-        if not all([x in section_sort_by for x in df[section_col].unique()]):
-            values_not_found = [x for x in df[section_col].unique() if x not in section_sort_by]
+        values_not_found = [x for x in unique_sections if x not in section_sort_by_set]
+        if values_not_found:
             raise ValueError(
                 f"Values in section_col not found in section_sort_by: {values_not_found}"
             )
@@ -119,68 +130,69 @@ def format_graphic_data(
     ]].copy()
 
     # Rename columns
-    df_element = df_element.rename(
-        columns={
-            section_col: 'section',
-            element_title_col: 'element_title',
-            element_subtitle_col: 'element_subtitle',
-            element_image_col: 'element_image',
-        }
-    )
+    # NB: Assigning to columns relabels df_element in place, where rename() would
+    # return a further copy of the data
+    df_element.columns = ['section', 'element_title', 'element_subtitle', 'element_image']
 
     # Drop rows with missing values in section_col
     df_element = df_element.dropna(subset='section')
 
     # Calculate subtotals by section
-    df_section = pd.DataFrame(
-        df_element.groupby('section').size(),
-        columns=['elements']
-    ).reset_index()
+    # NB: sort_index() only sorts the unique sections, and puts sections in name order
+    # before they're sorted below
+    # NB: Where section_col is categorical, value_counts() includes unused categories
+    # with a count of zero. These are dropped so only observed sections are drawn
+    section_elements = df_element['section'].value_counts(sort=False)
+    df_section = section_elements[
+        section_elements > 0
+    ].sort_index().rename_axis('section').reset_index(name='elements')
 
     # Sort df_section
     if section_sort_by in ['section', 'elements']:
 
+        # NB: A stable sort is used so that sections with equal numbers of elements
+        # stay in name order
         df_section = df_section.sort_values(
             by=section_sort_by,
             ascending=section_sort_order == 'ascending',
+            kind='stable',
         ).reset_index(drop=True)
 
     elif isinstance(section_sort_by, list):
 
-        # Make section column categorical with ordering
-        df_section['section'] = pd.Categorical(
-            df_section['section'],
-            categories=section_sort_by,
-            ordered=True,
-        )
-
-        # Sort
-        df_section = df_section.sort_values(
-            by='section',
-            ascending=True,
-        ).reset_index(drop=True)
+        # Sort by position in section_sort_by
+        # NB: Mapping each section to its position gives an integer sort key, rather
+        # than making the section column categorical to sort it
+        section_rank = {section: rank for rank, section in enumerate(section_sort_by)}
+        section_sort_key = df_section['section'].map(section_rank).to_numpy(dtype=np.int64)
+        df_section = df_section.iloc[
+            np.argsort(section_sort_key, kind='stable')
+        ].reset_index(drop=True)
 
     # Calculate number of rows needed for each section
+    # NB: This operates on the underlying array of element counts rather than applying
+    # a function row by row
+    elements = df_section['elements'].to_numpy(dtype=np.int64)
     if offset_rows:
-        df_section['rows'] = df_section['elements'].apply(
-            lambda x: calculate_offset_rows(x, elements_per_row)
-        )
+        df_section['rows'] = calculate_offset_rows(elements, elements_per_row)
     else:
-        df_section['rows'] = df_section['elements'].apply(lambda x: -(-x // elements_per_row))
-
-    # Make df_element section column categorical with ordering, following ordering of df_section
-    df_element['section'] = pd.Categorical(
-        df_element['section'],
-        categories=df_section['section'],
-        ordered=True,
-    )
-
-    # Sort elements
-    # NB: Since section is a categorical column this sorts by the pre-defined order
-    # NB: Sorting by 'index' applies the original order as a secondary ordering
-    df_element = df_element.reset_index().sort_values(
-        by=['section', 'index'],
-        ascending=[True, True],
-    ).reset_index(drop=True).drop(columns='index')
+        df_section['rows'] = (elements + elements_per_row - 1) // elements_per_row
+
+    # Sort elements, following ordering of df_section
+    # NB: Mapping each section to its position in df_section gives an integer sort key
+    # NB: Index labels of df are used as a secondary sort key, so elements within a
+    # section keep the order of their labels rather than their row positions
+    # NB: Where elements are already in section and label order, e.g. because df was
+    # sorted before being passed in, they aren't reordered
+    section_order = dict(zip(df_section['section'], range(len(df_section))))
+    section_sort_key = df_element['section'].map(section_order)
+    if not (
+        section_sort_key.is_monotonic_increasing and
+        df_element.index.is_monotonic_increasing
+    ):
+        df_element = df_element.iloc[
+            np.lexsort((df_element.index.to_numpy(), section_sort_key.to_numpy()))
+        ]
+    df_element = df_element.reset_index(drop=True)
 
     return df_element, df_section
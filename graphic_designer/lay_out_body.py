@@ -14,65 +14,211 @@
         None
 """
 
-import os
+from collections import defaultdict
+from functools import lru_cache, partial, wraps
+import hashlib
+from types import MappingProxyType
 from typing import Literal, TextIO, Union
 
 import drawsvg as draw
+from drawsvg import font_embed
+import numpy as np
 import pandas as pd
 
-from draw_element import draw_element
+from draw_element import draw_element_fast, encode_image
 
-# Import cairosvg from its DLL
-# NB: Following the approach described here and in related
-# comment: https://stackoverflow.com/a/60220855/4659442
-os.environ['path'] += r';C:/Program Files/Inkscape/bin'
-import cairosvg     # noqa: E402, F401
+# Default dimensions
+# NB: These are read-only, so they can be shared between calls without one call
+# changing the defaults used by another
+DRAW_AREA_MARGIN_DIM = MappingProxyType({'top': 10, 'right': 10, 'bottom': 10, 'left': 10})
+SECTION_HEAD_PADDING_DIM = MappingProxyType({'top': 5, 'right': 5, 'bottom': 5, 'left': 5})
+ELEMENT_MARGIN_DIM = MappingProxyType({'top': 2, 'right': 2, 'bottom': 2, 'left': 2})
+ELEMENT_CIRCLE_PADDING_DIM = MappingProxyType({'top': 2, 'right': 2, 'bottom': 2, 'left': 2})
 
+# Number of laid out graphic bodies to keep in memory
+LAYOUT_CACHE_SIZE = 16
 
-def calculate_offset_element_totals(
+
+def calculate_element_positions(
     elements: int,
     elements_per_row: int,
-) -> list[int]:
+    element_width: float,
+    element_height: float,
+    x: float = 0,
+    y: float = 0,
+    offset_rows: bool = False,
+) -> tuple[np.ndarray, np.ndarray]:
     """
-    For a given total number of elements, produce a list where
-    each element is the total number of elements up to the end
-    of the corresponding row in a graphic where rows are offset
+    Calculate positions of the elements in a section
 
     Parameters
         - elements: Number of elements in the section
         - elements_per_row: Number of elements to be drawn per row. Where offset_rows is
         True, this will be the number of elements in the odd rows of each section and
         even rows will contain one fewer element
+        - element_width: Width of each element
+        - element_height: Height of each element
+        - x: x-coordinate of top-left corner of the section body
+        - y: y-coordinate of top-left corner of the section body
+        - offset_rows: Whether every other row should be offset relative to the previous
+        row and contain one fewer element
 
     Returns
-        - List of element totals
+        - Arrays of x- and y-coordinates of the top-left corner of each element
 
     Notes
-        - None
+        - Positions are calculated for all elements at once, rather than by moving a
+        pointer element by element
     """
+    element_index = np.arange(elements)
 
-    # Initialize the sequence with the first term
-    sequence = [elements_per_row]
+    if offset_rows:
 
-    # Generate the sequence for n terms
-    i = 1
-    while sequence[-1] < elements:
-        if i % 2 != 0:
-            next_term = sequence[-1] + elements_per_row - 1
-        else:
-            next_term = sequence[-1] + elements_per_row
-        sequence.append(next_term)
-        i += 1
+        # Find position of each element within its pair of rows
+        # NB: Each pair of rows holds 2 * elements_per_row - 1 elements. Elements beyond
+        # the first elements_per_row are in the second, offset row of the pair
+        row_pair, row_pair_index = divmod(element_index, 2 * elements_per_row - 1)
+        offset = row_pair_index >= elements_per_row
+
+        row = 2 * row_pair + offset
+        column = row_pair_index - elements_per_row * offset + offset / 2
+
+    else:
+        row, column = divmod(element_index, elements_per_row)
+
+    return x + column * element_width, y + row * element_height
+
+
+@lru_cache(maxsize=8)
+def download_font_css(
+    font: str,
+) -> str:
+    """
+    Download CSS embedding a Google font
+
+    Parameters
+        - font: Name of font family
+
+    Returns
+        - CSS defining the font, with font files embedded as data URIs
+
+    Notes
+        - This does the same as drawsvg's Drawing.embed_google_font(), but results
+        are cached, so the font is only downloaded once however many graphics are
+        laid out with it
+    """
+    return font_embed.download_google_font_css(font)
+
+
+def get_section_colors(
+    color: Union[str, dict],
+) -> defaultdict:
+    """
+    Produce a lookup of colours by section
+
+    Parameters
+        - color: Colour. If a string, this colour is applied to all sections. If a
+        dictionary, each key should be a section name and the corresponding value
+        should be the colour for that section
+
+    Returns
+        - Dictionary of colours by section, returning the default colour for
+        sections that aren't included
+
+    Notes
+        - Where color is a dictionary, sections not included default to black
+    """
+    if isinstance(color, dict):
+        return defaultdict(lambda: 'black', color)
+
+    return defaultdict(lambda: color)
+
+
+def hash_layout_inputs(
+    df_element: pd.DataFrame,
+    df_section: pd.DataFrame,
+    args: tuple,
+    kwargs: dict,
+) -> bytes:
+    """
+    Hash inputs to lay_out_body()
+
+    Parameters
+        - df_element: DataFrame of data to be used when drawing graphic elements
+        - df_section: DataFrame of section subtotals
+        - args: Further positional arguments
+        - kwargs: Keyword arguments
+
+    Returns
+        - BLAKE2b digest of the inputs
+
+    Notes
+        - DataFrames are hashed by their contents, column names and index, so
+        equal data gives the same hash even if it's held in different objects
+        - Other arguments are hashed by their repr(), which covers the strings,
+        numbers, lists and dicts lay_out_body() takes
+    """
+    digest = hashlib.blake2b()
+
+    for df in (df_element, df_section):
+        digest.update(repr(list(df.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+
+    digest.update(repr((args, sorted(kwargs.items()))).encode())
+
+    return digest.digest()
+
+
+def cache_layout(
+    func,
+):
+    """
+    Cache laid out graphic bodies by their inputs
+
+    Parameters
+        - func: Function to be cached. This should take df_element and df_section as
+        its first two arguments
+
+    Returns
+        - Cached function. The cache can be emptied with its cache_clear() method
+
+    Notes
+        - This means re-running a notebook cell with unchanged data and parameters
+        returns the graphic body from the previous run, rather than laying it out again
+        - Up to LAYOUT_CACHE_SIZE results are kept, with the oldest dropped first
+        - Images are read when a graphic body is first laid out, and encoded images
+        are cached by encode_image(). If images are changed on disk, cache_clear()
+        should be called, which empties both caches
+    """
+    cache = {}
 
-    return sequence
+    @wraps(func)
+    def cached_func(df_element, df_section, *args, **kwargs):
+        key = hash_layout_inputs(df_element, df_section, args, kwargs)
+
+        if key not in cache:
+            if len(cache) >= LAYOUT_CACHE_SIZE:
+                cache.pop(next(iter(cache)))
+            cache[key] = func(df_element, df_section, *args, **kwargs)
+
+        return cache[key]
+
+    def cache_clear():
+        cache.clear()
+        encode_image.cache_clear()
+
+    cached_func.cache_clear = cache_clear
+
+    return cached_func
 
 
 # DEFINE FUNCTION
+@cache_layout
 def lay_out_body(
     df_element: pd.DataFrame,
     df_section: pd.DataFrame,
     body_width: int = 800,
-    draw_area_margin_dim: dict = {'top': 10, 'right': 10, 'bottom': 10, 'left': 10},
+    draw_area_margin_dim: dict = None,
     font: str = 'Open Sans',
     section_head_position: Union[Literal['left'], Literal['top']] = 'top',
     section_head_width: int = 100,
@@ -82,7 +228,7 @@ def lay_out_body(
     section_head_text_weight: int = 600,
     section_head_text_color: Union[str, dict] = 'black',
     section_head_background_color: str = 'white',
-    section_head_padding_dim: dict = {'top': 5, 'right': 5, 'bottom': 5, 'left': 5},
+    section_head_padding_dim: dict = None,
     elements_per_row: int = 5,
     offset_rows: bool = False,
     element_height: int = 50,
@@ -97,10 +243,10 @@ def lay_out_body(
     element_subtitle_text_style: str = None,
     element_circle_stroke_width: int = 2,
     element_background_color: str = 'white',
-    element_margin_dim: dict = {'top': 2, 'right': 2, 'bottom': 2, 'left': 2},
-    element_circle_padding_dim: dict = {'top': 2, 'right': 2, 'bottom': 2, 'left': 2},
+    element_margin_dim: dict = None,
+    element_circle_padding_dim: dict = None,
     display_section_totals: bool = False,
-    merge_sections: list = []
+    merge_sections: list = None
 ) -> TextIO:
     """
     Lay out graphic body
@@ -109,7 +255,8 @@ def lay_out_body(
         - df_element: DataFrame of data to be used when drawing graphic elements
         - df_section: DataFrame of section subtotals
         - body_width: Width of the graphic body
-        - draw_area_margin_dim: Margin dimensions for the draw area
+        - draw_area_margin_dim: Margin dimensions for the draw area. Defaults to
+        DRAW_AREA_MARGIN_DIM
         - font: Font to be used in the graphic body
         - section_head_position: Whether section heads should be drawn above
         or to the left of the section body. Options are 'top' or 'left'
@@ -124,7 +271,8 @@ def lay_out_body(
         color is applied to all section heads. If a dictionary, each key should be a
         section name and the corresponding value should be the color for that section
         - section_head_background_color: Background color of section heads
-        - section_head_padding_dim: Padding dimensions for section heads
+        - section_head_padding_dim: Padding dimensions for section heads. Defaults to
+        SECTION_HEAD_PADDING_DIM
         - elements_per_row: Number of elements to be drawn per row. Where offset_rows is
         True, this will be the number of elements in the odd rows of each section and
         even rows will contain one fewer element
@@ -146,8 +294,10 @@ def lay_out_body(
         - element_subtitle_text_style: Font style of element subtitles
         - element_circle_stroke_width: Stroke width of circle
         - element_background_color: Background color of elements
-        - element_margin_dim: Margin dimensions for each element
-        - element_circle_padding_dim: Padding dimensions for element circles
+        - element_margin_dim: Margin dimensions for each element. Defaults to
+        ELEMENT_MARGIN_DIM
+        - element_circle_padding_dim: Padding dimensions for element circles. Defaults
+        to ELEMENT_CIRCLE_PADDING_DIM
         - display_section_totals: Whether section totals should be displayed
         - merge_sections: List of sections to merge. Only applicable where
         section_head_position is 'top', as sections can't be merged where
@@ -158,21 +308,47 @@ def lay_out_body(
         - body: Graphic body
 
     Notes
-        - None
+        - Results are cached by their inputs. See cache_layout()
     """
 
+    # Apply defaults
+    # NB: Defaults are applied here rather than in the function signature, so that
+    # no mutable dict or list is shared between calls. Default dimensions are
+    # read-only, and a new list is created for merge_sections on each call
+    if draw_area_margin_dim is None:
+        draw_area_margin_dim = DRAW_AREA_MARGIN_DIM
+    if section_head_padding_dim is None:
+        section_head_padding_dim = SECTION_HEAD_PADDING_DIM
+    if element_margin_dim is None:
+        element_margin_dim = ELEMENT_MARGIN_DIM
+    if element_circle_padding_dim is None:
+        element_circle_padding_dim = ELEMENT_CIRCLE_PADDING_DIM
+    if merge_sections is None:
+        merge_sections = []
+
     # Calculate total row count
     total_rows = df_section['rows'].sum()
     section_heads = len(df_section)
 
+    # Flag sections to be merged
+    # NB: The flag is calculated once and reused for each check and adjustment, and
+    # in the section loop. Sections can only be merged where section_head_position
+    # is 'top'
+    df_section = df_section.assign(
+        is_merge=(
+            section_head_position == 'top' and
+            df_section['section'].isin(merge_sections)
+        )
+    )
+
     # Handle merge_sections
     if section_head_position == 'top' and merge_sections:
 
+        # Select sections to be merged
+        df_merge_section = df_section.loc[df_section['is_merge']]
+
         # Check sections to be merged fit onto a single row
-        merge_sections_elements = df_section.loc[
-            df_section['section'].isin(merge_sections),
-            'elements'
-        ].sum()
+        merge_sections_elements = df_merge_section['elements'].sum()
         if merge_sections_elements > elements_per_row:
             raise ValueError(
                 'Sections to merge must fit onto a single row. Sections supplied in ' +
@@ -181,23 +357,17 @@ def lay_out_body(
             )
 
         # Check sections to be merged are in the correct order
-        if df_section.loc[
-            df_section['section'].isin(merge_sections),
-            'section'
-        ].tolist() != merge_sections:
+        if (
+            len(df_merge_section) != len(merge_sections) or
+            not (df_merge_section['section'].to_numpy() == np.asarray(merge_sections)).all()
+        ):
             raise ValueError(
                 'Sections to merge must be supplied in the order they appear in the data'
             )
 
         # Adjust total row count
-        merge_rows_initial = df_section.loc[
-            df_section['section'].isin(merge_sections)
-        ]['rows'].sum()
-        merge_rows_final = - (
-            - df_section.loc[
-                df_section['section'].isin(merge_sections)
-            ]['elements'].sum() // elements_per_row
-        )
+        merge_rows_initial = df_merge_section['rows'].sum()
+        merge_rows_final = - (- merge_sections_elements // elements_per_row)
         total_rows = total_rows - merge_rows_initial + merge_rows_final
 
         # Adjust section_heads count
@@ -225,7 +395,7 @@ def lay_out_body(
     body = draw.Drawing(body_width, body_height)
 
     # Add font
-    body.embed_google_font(font)
+    body.append_css(download_font_css(font))
 
     # Add background
     body.append(
@@ -242,228 +412,224 @@ def lay_out_body(
     # the draw_area though - this still needs to be managed as part of drawing elements
     # Ref: https://gist.github.com/mbostock/3019563
     draw_area = draw.Group(
-        transform=(
-            'translate(' +
-            str(draw_area_margin_dim['left']) + ',' +
-            str(draw_area_margin_dim['top']) +
-            ')'
+        transform=f"translate({draw_area_margin_dim['left']},{draw_area_margin_dim['top']})"
+    )
+
+    # Bind styling shared by all elements
+    # NB: This means only arguments that vary between elements are passed in the
+    # element loop
+    # NB: Elements are written directly as SVG markup, as they aren't edited after
+    # being drawn. This avoids building drawsvg objects for each element
+    draw_styled_element = partial(
+        draw_element_fast,
+        background_color=element_background_color,
+        title_text_size=element_title_text_size,
+        title_text_weight=element_title_text_weight,
+        title_text_style=element_title_text_style,
+        subtitle_text_size=element_subtitle_text_size,
+        subtitle_text_weight=element_subtitle_text_weight,
+        subtitle_text_style=element_subtitle_text_style,
+        font_family=font,
+        title_position=element_title_position,
+        text_anchor='middle',
+        margin_dim=element_margin_dim,
+        circle_stroke_width=element_circle_stroke_width,
+        circle_padding_dim=element_circle_padding_dim,
+    )
+
+    # Set section head text and colours, and element text colours
+    # NB: These are calculated for all sections at once, rather than in the section loop
+    # NB: get_section_colors() means colours are looked up in the same way whether
+    # they're supplied as a string or a dictionary
+    if display_section_totals:
+        section_head_texts = (
+            df_section['section'].astype(str) + ': ' + df_section['elements'].astype(str)
         )
+    else:
+        section_head_texts = df_section['section']
+
+    df_section = df_section.assign(
+        head_text=section_head_texts,
+        head_text_color=df_section['section'].map(
+            get_section_colors(section_head_text_color)
+        ),
+        title_text_color=df_section['section'].map(
+            get_section_colors(element_title_text_color)
+        ),
+        subtitle_text_color=df_section['section'].map(
+            get_section_colors(element_subtitle_text_color)
+        ),
+    )
+
+    # Treat missing images as no image
+    # NB: Missing values, e.g. where no portrait was found for an MP, are replaced with
+    # None, which means draw_element_fast() draws the element without an image
+    df_element = df_element.assign(
+        element_image=df_element['element_image'].astype(object).where(
+            df_element['element_image'].notna(), None
+        )
+    )
+
+    # Group elements by section
+    # NB: This finds the positions of each section's elements in df_element once,
+    # rather than filtering df_element for each section. Only the positions are
+    # stored, with each section's elements taken from df_element in the section loop
+    # NB: observed=True avoids creating groups for unused categories where section is
+    # categorical
+    element_groups = df_element.groupby('section', sort=False, observed=True).indices
+    no_elements = np.array([], dtype=np.intp)
+
+    # Calculate section dimensions that are the same for all sections
+    # NB: By calculating left and top section head dimensions for both
+    # section_head_position options, this simplifies the logic that comes after
+    if section_head_position == 'left':
+        left_head_width = section_head_width
+        top_head_width = 0
+        top_head_height = 0
+    elif section_head_position == 'top':
+        left_head_width = 0
+        top_head_width = draw_area_dim['width']
+        top_head_height = section_head_height
+
+    head_width = left_head_width + top_head_width
+    section_body_width = draw_area_dim['width'] - left_head_width
+
+    # Calculate section dimensions that vary between sections
+    # NB: These only depend on the number of rows in each section, so are calculated
+    # for all sections at once
+    section_body_heights = df_section['rows'] * element_height
+    if section_head_position == 'left':
+        head_heights = section_body_heights
+    else:
+        head_heights = top_head_height
+
+    df_section = df_section.assign(
+        body_height=section_body_heights,
+        head_height=head_heights,
     )
 
+    # Calculate position of section head text, relative to the top-left corner of
+    # the section head
+    # NB: Only the vertical position can vary between sections, as it depends on the
+    # section head height
+    head_text_x_offset = section_head_padding_dim['left']
+    if section_head_vertical_text_align == 'top':
+        head_text_y_offset = section_head_padding_dim['top'] + section_head_text_size
+    elif section_head_vertical_text_align == 'center':
+        head_text_y_offset = (
+            section_head_padding_dim['top'] +
+            (df_section['head_height'] + section_head_text_size) / 2 -
+            section_head_padding_dim['bottom']
+        )
+    elif section_head_vertical_text_align == 'bottom':
+        head_text_y_offset = df_section['head_height'] - section_head_padding_dim['bottom']
+
+    df_section = df_section.assign(head_text_y_offset=head_text_y_offset)
+
+    # Calculate element dimensions
+    element_width = section_body_width / elements_per_row
+
     # Initialise pointers used to position SVG components
     x = 0
     y = 0
 
     # Create sections
-    for i, row in df_section.iterrows():
-
-        # Calculate section dimensions
-        # NB: By calculating left_section_head_dim, top_section_head_dim for both
-        # section_head_position options, this simplifies the logic that comes after
-        if section_head_position == 'left':
-            left_section_head_dim = {
-                'width': section_head_width,
-                'height': row['rows'] * element_height
-            }
-            top_section_head_dim = {
-                'width': 0,
-                'height': 0
-            }
-        elif section_head_position == 'top':
-            left_section_head_dim = {
-                'width': 0,
-                'height': 0
-            }
-            top_section_head_dim = {
-                'width': draw_area_dim['width'],
-                'height': section_head_height
-            }
-
-        section_head_dim = {
-            'width': left_section_head_dim['width'] + top_section_head_dim['width'],
-            'height': left_section_head_dim['height'] + top_section_head_dim['height']
-        }
-        section_body_dim = {
-            'width': draw_area_dim['width'] - left_section_head_dim['width'],
-            'height': row['rows'] * element_height
-        }
+    # NB: itertuples() is used rather than iterrows() as it doesn't construct a Series
+    # for each row
+    for row in df_section.itertuples(index=False):
 
-        # Calculate element dimensions
-        element_dim = {
-            'width': section_body_dim['width'] / elements_per_row,
-            'height': element_height
-        }
+        # Set section dimensions
+        section_body_height = row.body_height
+        head_height = row.head_height
 
         # Draw section head
+        # NB: Coordinates are rounded to keep the size of the resulting SVG down
         draw_area.append(
             draw.Rectangle(
-                x=x, y=y,
-                width=section_head_dim['width'] - x, height=section_head_dim['height'],
+                x=round(x, 2), y=round(y, 2),
+                width=round(head_width - x, 2), height=round(head_height, 2),
                 fill=section_head_background_color,
                 stroke_width=0
             )
         )
 
         # Calculate text position
-        if section_head_vertical_text_align == 'top':
-            text_x = x + section_head_padding_dim['left']
-            text_y = y + section_head_padding_dim['top'] + section_head_text_size
-        elif section_head_vertical_text_align == 'center':
-            text_x = x + section_head_padding_dim['left']
-            text_y = (
-                y + section_head_padding_dim['top'] +
-                (section_head_dim['height'] + section_head_text_size) / 2 -
-                section_head_padding_dim['bottom']
-            )
-        elif section_head_vertical_text_align == 'bottom':
-            text_x = x + section_head_padding_dim['left']
-            text_y = y + section_head_dim['height'] - section_head_padding_dim['bottom']
+        text_x = round(x + head_text_x_offset, 2)
+        text_y = round(y + row.head_text_y_offset, 2)
 
         # Draw section head text
-        if isinstance(section_head_text_color, dict):
-            if row['section'] in section_head_text_color:
-                text_color = section_head_text_color[row['section']]
-            else:
-                text_color = 'black'
-        else:
-            text_color = section_head_text_color
-
-        if isinstance(element_title_text_color, dict):
-            if row['section'] in element_title_text_color:
-                title_text_color = element_title_text_color[row['section']]
-            else:
-                title_text_color = 'black'
-        else:
-            title_text_color = element_title_text_color
-
-        if isinstance(element_subtitle_text_color, dict):
-            if row['section'] in element_subtitle_text_color:
-                subtitle_text_color = element_subtitle_text_color[row['section']]
-            else:
-                subtitle_text_color = 'black'
-        else:
-            subtitle_text_color = element_subtitle_text_color
-
-        if display_section_totals:
-            section_head_text = f"{row['section']}: {row['elements']}"
-        else:
-            section_head_text = row['section']
-
         draw_area.append(
             draw.Text(
-                section_head_text,
+                row.head_text,
                 x=text_x, y=text_y,
                 font_size=section_head_text_size,
                 font_weight=section_head_text_weight,
                 font_family=font,
-                fill=text_color,
+                fill=row.head_text_color,
                 text_anchor='start'
             )
         )
 
-        x += left_section_head_dim['width']
-        y += top_section_head_dim['height']
-
-        # Initialise counter and pointers
-        # NB: A seperate counter is used to track the element number, as iterrows()'s
-        # j tracks all rows in df_element, not just the rows for the current section
-        element_i = 0
-
-        element_x = x
-        element_y = y
-
-        # Calculate list of element totals
-        if offset_rows:
-            element_totals = calculate_offset_element_totals(
-                elements=row['elements'],
-                elements_per_row=elements_per_row
-            )
+        x += left_head_width
+        y += top_head_height
+
+        # Set values shared by all elements in the section
+        # NB: Element circles take the colour of the section head text
+        df_section_element = df_element.take(element_groups.get(row.section, no_elements))
+        circle_stroke_color = row.head_text_color
+        title_text_color = row.title_text_color
+        subtitle_text_color = row.subtitle_text_color
+
+        # Calculate element positions
+        element_xs, element_ys = calculate_element_positions(
+            elements=len(df_section_element),
+            elements_per_row=elements_per_row,
+            element_width=element_width,
+            element_height=element_height,
+            x=x,
+            y=y,
+            offset_rows=offset_rows,
+        )
 
         # Draw elements
-        for j, element_row in df_element.loc[
-            df_element['section'] == row['section']
-        ].iterrows():
-
-            # Iterate counter
-            element_i += 1
-
-            # Set circle stroke color
-            if isinstance(section_head_text_color, dict):
-                if element_row['section'] in section_head_text_color:
-                    circle_stroke_color = section_head_text_color[element_row['section']]
-                else:
-                    circle_stroke_color = 'black'
-            else:
-                circle_stroke_color = section_head_text_color
-
-            # Draw element
-            draw_area.append(
-                draw_element(
-                    x=element_x,
-                    y=element_y,
-                    width=element_dim['width'],
-                    height=element_dim['height'],
-                    background_color=element_background_color,
-                    title=element_row['element_title'],
-                    title_text_size=element_title_text_size,
-                    title_text_weight=element_title_text_weight,
-                    title_text_color=title_text_color,
-                    title_text_style=element_title_text_style,
-                    subtitle=element_row['element_subtitle'],
-                    subtitle_text_size=element_subtitle_text_size,
-                    subtitle_text_weight=element_subtitle_text_weight,
-                    subtitle_text_color=subtitle_text_color,
-                    subtitle_text_style=element_subtitle_text_style,
-                    font_family=font,
-                    title_position=element_title_position,
-                    text_anchor='middle',
-                    image=element_row['element_image'],
-                    margin_dim=element_margin_dim,
-                    circle_stroke_width=element_circle_stroke_width,
-                    circle_stroke_color=circle_stroke_color,
-                    circle_padding_dim=element_circle_padding_dim
-                )
+        # NB: Element markup is collected in a list and added to draw_area in one go
+        # NB: Each element's background is drawn with the element, so that it covers
+        # any text overflowing from the previous element
+        section_elements = [
+            draw_styled_element(
+                x=element_x,
+                y=element_y,
+                width=element_width,
+                height=element_height,
+                title=element_row.element_title,
+                title_text_color=title_text_color,
+                subtitle=element_row.element_subtitle,
+                subtitle_text_color=subtitle_text_color,
+                image=element_row.element_image,
+                circle_stroke_color=circle_stroke_color,
             )
+            for element_row, element_x, element_y in zip(
+                df_section_element.itertuples(index=False),
+                element_xs.tolist(),
+                element_ys.tolist(),
+            )
+        ]
+        draw_area.append(draw.Raw(''.join(section_elements)))
 
-            # Check if row is complete
-            if offset_rows:
-
-                if element_i in element_totals:
-
-                    # After odd rows (0-based indexing), apply offset
-                    if element_totals.index(element_i) % 2 != 0:
-                        element_x = x
-                        element_y += element_dim['height']
-
-                    # After even rows, don't apply offset
-                    else:
-                        element_x = x + element_dim['width'] / 2
-                        element_y += element_dim['height']
-
-                else:
-                    element_x += element_dim['width']
-
-            else:
-                if element_i % elements_per_row == 0:
-                    element_x = x
-                    element_y += element_dim['height']
-                else:
-                    element_x += element_dim['width']
-
-        y += section_body_dim['height']
+        y += section_body_height
 
         # Reset y pointer where section is merged
         # NB: This moves the y pointer back to the top of the previous section
         # head and pre-emptively resets x back the end of the previous row
-        if section_head_position == 'top' and row['section'] in merge_sections:
-            y -= top_section_head_dim['height']
-            y -= section_body_dim['height']
+        if row.is_merge:
+            y -= top_head_height
+            y -= section_body_height
 
         # Set x pointer
-        if not (section_head_position == 'top' and row['section'] in merge_sections):
+        if not row.is_merge:
             x = 0
         else:
-            x += element_i * element_dim['width']
+            x += len(df_section_element) * element_width
 
     # Add draw_area to body
     body.append(draw_area)
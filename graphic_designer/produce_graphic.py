@@ -13,7 +13,11 @@
         - svg: <graphic-filename>.svg
     Parameters
         - ifg_dark_grey: Colour used for text
+        - data_filepath: Filepath of MP data
         - dict_party_colours: Party colours
+        - dict_party_names: Party names to be replaced, e.g. to expand abbreviations
+        - dict_constituency_names: Constituency names to be replaced, e.g. to
+        abbreviate long names
         - image_filepath_stub: Stub of image filepaths
         - image_source: Non-default image sources
         - See format_graphic_data(), lay_out_body(),
@@ -27,14 +31,131 @@
         fixes this - there's no need to restart the kernel, so it's unclear why this happens
 """
 
+import hashlib
 import os
+import pickle
+import tempfile
 
 from IPython.display import display
+import numpy as np
 import pandas as pd
 
 from format_graphic_data import format_graphic_data
 from lay_out_body import lay_out_body
 
+# Read Excel files with calamine where it's installed
+# NB: calamine is much faster than openpyxl, which pandas uses for .xlsm files by
+# default. pandas supports calamine from version 2.2, so the default is used with
+# earlier versions even if calamine is installed
+try:
+    import python_calamine     # noqa: F401
+    calamine_installed = True
+except ImportError:
+    calamine_installed = False
+
+pandas_version = tuple(int(v) for v in pd.__version__.split('.')[:2])
+EXCEL_ENGINE = 'calamine' if calamine_installed and pandas_version >= (2, 2) else None
+
+# Cache data in a directory only the current user can write to
+# NB: This is under %LOCALAPPDATA% on Windows and ~/.cache elsewhere, rather than the
+# shared temp directory, so other users can't plant cache files that would be loaded
+CACHE_DIR = os.path.join(
+    os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'graphic-designer',
+)
+
+
+# %%
+# DEFINE FUNCTIONS
+def load_mps(
+    filepath: str,
+    sheet_name: str = 'Data',
+) -> pd.DataFrame:
+    """
+    Read in MP data, dropping notes below the data
+
+    Parameters
+        - filepath: Filepath of Excel workbook
+        - sheet_name: Name of sheet holding the data
+
+    Returns
+        - df: MP data
+
+    Notes
+        - The data is cached in CACHE_DIR, with one cache file per workbook and
+        sheet. The cache is only used where the workbook's modification time and
+        size, and the engine used to read it, match those stored with it, so
+        re-running the script with an unchanged workbook reads the cache rather than
+        parsing the workbook again
+        - A cache file that is missing, incomplete or was written by another version
+        of pandas is ignored and replaced. Other errors, e.g. permission errors, are
+        raised
+        - Only the data as read from the workbook is cached, so edits made to it
+        later in the script take effect without clearing the cache
+        - The workbook is read with EXCEL_ENGINE, which is calamine where it's
+        installed and otherwise pandas' default
+    """
+
+    # Find cache filepath and key
+    # NB: The cache filepath only depends on the workbook and sheet, so a changed
+    # workbook replaces its cache file rather than adding another one
+    cache_name = hashlib.blake2b(
+        f'{os.path.abspath(filepath)}|{sheet_name}'.encode(),
+        digest_size=16,
+    ).hexdigest()
+    cache_filepath = os.path.join(CACHE_DIR, f'{cache_name}.pkl')
+
+    stat = os.stat(filepath)
+    cache_key = (stat.st_mtime_ns, stat.st_size, EXCEL_ENGINE)
+
+    # Read cached data, where it matches the workbook
+    # NB: Where there's no cache file, or it can't be unpickled, the workbook is read
+    # instead. AttributeError and ImportError are raised when unpickling data written
+    # by a different version of pandas
+    try:
+        cached_key, df = pd.read_pickle(cache_filepath)
+        if cached_key == cache_key:
+            return df
+    except (
+        FileNotFoundError, EOFError, pickle.UnpicklingError, ValueError,
+        AttributeError, ImportError,
+    ):
+        pass
+
+    # Read in data
+    df = pd.read_excel(filepath, sheet_name=sheet_name, engine=EXCEL_ENGINE)
+
+    # Drop rows after blank row separating data and notes
+    # NB: Rows are checked one column at a time, and only rows that are blank in every
+    # column checked so far are checked in the next column. This means most columns
+    # are only checked for a handful of rows, rather than checking every cell
+    # NB: Data is only trimmed if there is a blank row
+    blank_rows = np.flatnonzero(df.iloc[:, 0].isnull().to_numpy())
+    for column in range(1, df.shape[1]):
+        if not len(blank_rows):
+            break
+        blank_rows = blank_rows[pd.isnull(df.iloc[:, column].to_numpy()[blank_rows])]
+
+    if len(blank_rows):
+        df = df.iloc[:blank_rows[0]]
+
+    # Cache data
+    # NB: Data is written to a temporary file which is then moved into place, so an
+    # interrupted write can't leave a partial cache file behind
+    # NB: The cache directory is created so that only the current user can access it
+    os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+    temp_fd, temp_filepath = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+    os.close(temp_fd)
+    try:
+        pd.to_pickle((cache_key, df), temp_filepath)
+        os.replace(temp_filepath, cache_filepath)
+    except BaseException:
+        os.remove(temp_filepath)
+        raise
+
+    return df
+
+
 # %%
 # SET PARAMETERS
 # Colours
@@ -53,6 +174,15 @@ dict_party_colours = {
     'Independent': '#c1c5c8',
 }
 
+# Data location
+data_filepath = (
+    'C:/Users/' + os.getlogin() + '/'
+    'Institute for Government/Data - General/'
+    'UK government and politics/MPs/'
+    'MPs standing down/'
+    'MPs standing down GE24 main data.xlsm'
+)
+
 # Image locations
 image_filepath_stub = (
     'C:/Users/' + os.getlogin() + '/'
@@ -60,6 +190,27 @@ image_filepath_stub = (
     'Parliament/Member portraits/Images/'
 )
 
+# Party and constituency names
+# NB: These are non-exhaustive - names that aren't included are used as they are
+dict_party_names = {
+    'SNP': 'Scottish National\nParty',
+}
+
+dict_constituency_names = {
+    'Paisley and Renfrewshire South': 'Paisley & Renfrewshire S.',
+    'Ross, Skye and Lochaber': 'Ross, Skye & Lochaber',
+    'Dunfermline and West Fife': 'Dunfermline and W. Fife',
+    'Lanark and Hamilton East': 'Lanark and Hamilton E.',
+    'Glenrothes and Central Fife': 'Glenrothes and C. Fife',
+    'East Kilbride, Strathaven and Lesmahagow': "E. Kilbride, S'haven and L'gow",
+    'Bognor Regis and Littlehampton': "Bognor Regis and L'hampton",
+    'Rochford and Southend East': "R'ford and Southend E.",
+    'Cities of London and Westminster': "Cit. of London and W'minster",
+    'East Worthing and Shoreham': "E. Worthing and S'ham",
+    'Central Suffolk and North Ipswich': "C. Suffolk and N. Ipswich",
+    'Fermanagh and South Tyrone': "Fermanagh and S. Tyrone",
+}
+
 # Set parameter specifying non-default image sources
 image_source = {
     'Francie Molloy': 'Alamy/',
@@ -73,19 +224,7 @@ offset_rows = False
 # %%
 # READ IN DATA AND EDIT
 # Create data
-df = pd.read_excel(
-    'C:/Users/' + os.getlogin() + '/'
-    'Institute for Government/Data - General/'
-    'UK government and politics/MPs/'
-    'MPs standing down/'
-    'MPs standing down GE24 main data.xlsm',
-    sheet_name='Data',
-)
-
-# Drop rows after blank row separating data and notes
-df = df.loc[
-    :df.isnull().all(1).idxmax() - 1
-]
+df = load_mps(data_filepath)
 
 # Split name into first and last names
 df[['First name', 'Last name']] = df['Name'].str.split(
@@ -94,52 +233,32 @@ df[['First name', 'Last name']] = df['Name'].str.split(
     expand=True,
 )
 
-# Expand 'SNP'
-# NB: fillna() is needed as this is a non-exhaustive mapping
-df['Party'] = df['Party'].map(
-    {'SNP': 'Scottish National\nParty'}
-).fillna(df['Party'])
-
-# Abbreviate long constituency names
-df['Constituency'] = df['Constituency'].map({
-    'Paisley and Renfrewshire South': 'Paisley & Renfrewshire S.',
-    'Ross, Skye and Lochaber': 'Ross, Skye & Lochaber',
-    'Dunfermline and West Fife': 'Dunfermline and W. Fife',
-    'Lanark and Hamilton East': 'Lanark and Hamilton E.',
-    'Glenrothes and Central Fife': 'Glenrothes and C. Fife',
-    'East Kilbride, Strathaven and Lesmahagow': "E. Kilbride, S'haven and L'gow",
-    'Bognor Regis and Littlehampton': "Bognor Regis and L'hampton",
-    'Rochford and Southend East': "R'ford and Southend E.",
-    'Cities of London and Westminster': "Cit. of London and W'minster",
-    'East Worthing and Shoreham': "E. Worthing and S'ham",
-    'Central Suffolk and North Ipswich': "C. Suffolk and N. Ipswich",
-    'Fermanagh and South Tyrone': "Fermanagh and S. Tyrone",
-}).fillna(df['Constituency'])
+# Expand party names and abbreviate long constituency names
+# NB: replace() is used rather than map() as these are non-exhaustive mappings, so
+# values that aren't in the mappings are kept without needing fillna()
+df['Party'] = df['Party'].replace(dict_party_names)
+df['Constituency'] = df['Constituency'].replace(dict_constituency_names)
 
 # Add image filepaths
-for i, row in df.iterrows():
-
-    # Identify filepath
-    if row['Name'] in image_source:
-        image_filepath = (
-            image_filepath_stub + image_source[row['Name']]
-        )
-    else:
-        image_filepath = (
-            image_filepath_stub + 'Parliament/'
-        )
+# NB: Each image folder is listed once, and image filepaths are then looked up by folder
+# and Parliament ID, rather than searching the folder listing for every row
+image_folders = image_filepath_stub + df['Name'].map(image_source).fillna('Parliament/')
+image_keys = image_folders + df['Parliament ID'].astype(int).astype(str)
 
-    try:
-        image_filename = [
-            filename for filename in os.listdir(image_filepath)
-            if filename.startswith(str(int(row['Parliament ID'])) + '-')
-        ][-1]
-    except IndexError:
-        print(i, row['Parliament ID'], row['Name'])
-        pass
+# NB: Image filenames take the form <parliament_id>-<name>.<format>. Where there are
+# several images for a Parliament ID, the last one listed is used
+image_filepaths = {
+    image_folder + filename.split('-', 1)[0]: image_folder + filename
+    for image_folder in image_folders.unique()
+    for filename in os.listdir(image_folder)
+    if '-' in filename
+}
+
+df['Image filepath'] = image_keys.map(image_filepaths)
 
-    # Add to df
-    df.loc[i, 'Image filepath'] = image_filepath + image_filename
+# Report any MPs without an image
+if df['Image filepath'].isnull().any():
+    print(df.loc[df['Image filepath'].isnull(), ['Parliament ID', 'Name']])
 
 # %%
 # PRODUCE GRAPHIC DATA